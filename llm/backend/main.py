@@ -2,8 +2,10 @@ from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
-from routers import words, generate, tts
+from routers import words, generate, tts, session, debug
+from services.tracing import TracingMiddleware
 import logging
+import os
 import traceback
 
 # 로깅 설정
@@ -62,12 +64,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
 
+# 요청 ID 전파 및 트레이싱 (비활성화 시 바로 통과)
+app.add_middleware(TracingMiddleware)
+
 # 라우터 등록
 app.include_router(words.router, prefix="/api", tags=["words"])
 app.include_router(generate.router, prefix="/api", tags=["generate"])
 app.include_router(tts.router, prefix="/api", tags=["tts"])
+app.include_router(session.router, prefix="/api", tags=["session"])
+
+# 디버그 라우터 (트레이스/프로파일러): 사용자 입력 단어가 노출되므로 명시적으로 켠 경우에만 등록
+if os.getenv("DEBUG_ENDPOINTS_ENABLED", "0") == "1":
+    app.include_router(debug.router, prefix="/api", tags=["debug"])
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """서버 종료 시 사용 기록 기반 전이 테이블을 저장합니다."""
+    words.save_transitions()
 
 
 @app.get("/")
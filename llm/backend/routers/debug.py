@@ -0,0 +1,73 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+from typing import Optional
+from services import tracing
+import asyncio
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+class TracingToggleRequest(BaseModel):
+    """트레이싱 활성화 요청"""
+    enabled: bool
+
+
+class ProfilerStartRequest(BaseModel):
+    """샘플링 프로파일러 시작 요청"""
+    interval_ms: float = 5.0
+    duration_s: float = tracing.PROFILER_MAX_DURATION
+
+
+@router.get("/debug/traces")
+async def get_traces(
+    request_id: Optional[str] = None,
+    limit: int = Query(200, ge=1, le=tracing.TRACE_BUFFER_SIZE)
+):
+    """링 버퍼에 기록된 트레이싱 구간을 최신순으로 반환합니다."""
+    return {
+        "enabled": tracing.is_enabled(),
+        "spans": tracing.get_spans(request_id=request_id, limit=limit),
+    }
+
+
+@router.delete("/debug/traces")
+async def clear_traces():
+    """링 버퍼를 비웁니다."""
+    tracing.clear_spans()
+    return {"cleared": True}
+
+
+@router.post("/debug/tracing")
+async def toggle_tracing(request: TracingToggleRequest):
+    """트레이싱을 실행 중에 켜거나 끕니다."""
+    tracing.set_enabled(request.enabled)
+    return {"enabled": tracing.is_enabled()}
+
+
+@router.post("/debug/profiler/start")
+async def start_profiler(request: ProfilerStartRequest):
+    """
+    샘플링 프로파일러를 시작합니다.
+    간격은 최소 1ms, 실행 시간은 최대 PROFILER_MAX_DURATION초로 보정되며 이후 자동으로 멈춥니다.
+    """
+    if request.interval_ms <= 0 or request.duration_s <= 0:
+        raise HTTPException(status_code=400, detail="interval_ms와 duration_s는 0보다 커야 합니다.")
+    tracing.profiler.start(interval=request.interval_ms / 1000, duration=request.duration_s)
+    return {
+        "running": tracing.profiler.running,
+        "interval_ms": tracing.profiler.interval * 1000,
+        "duration_s": tracing.profiler.duration,
+    }
+
+
+@router.post("/debug/profiler/stop", response_class=PlainTextResponse)
+async def stop_profiler():
+    """
+    샘플링 프로파일러를 중지하고 collapsed stack 결과를 반환합니다.
+    flamegraph.pl 또는 speedscope로 플레임 그래프를 그릴 수 있습니다.
+    (샘플링 스레드 종료 대기는 스레드 풀에서 실행)
+    """
+    return await asyncio.to_thread(tracing.profiler.stop)
@@ -1,7 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from models.schemas import GenerateRequest, GenerateResponse
-from services import OllamaService
+from services import OllamaService, SentenceBuilder
+from services.tracing import span
+from routers.words import GENERATE_TRANSITION_WEIGHT, get_profile, get_profile_manager, record_selections
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import contextvars
 import logging
+import os
+import threading
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -9,58 +17,131 @@ logger = logging.getLogger(__name__)
 # Ollama 서비스 인스턴스 (전역)
 ollama_service = None
 
+# 규칙 기반 문장 조립기 인스턴스 (프로필별, 전역)
+sentence_builders: Dict[str, SentenceBuilder] = {}
+
+# LLM 응답 대기 시간 예산 (초). 초과하면 규칙 기반 문장을 반환
+GENERATE_LATENCY_BUDGET = float(os.getenv("GENERATE_LATENCY_BUDGET", "3.0"))
+
+# 동시에 진행할 수 있는 Ollama 호출 수
+# 기한을 넘긴 호출도 Ollama 타임아웃까지 작업 스레드를 점유하므로 기본 스레드 풀과 분리
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+llm_executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="ollama")
+_llm_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+
+
+class SourcedGenerateResponse(GenerateResponse):
+    """문장 생성 응답 (생성 출처 포함: "llm" 또는 "rule")"""
+    source: str = "llm"
+
 
 def get_ollama_service() -> OllamaService:
     """Ollama 서비스 인스턴스를 반환합니다."""
     global ollama_service
     if ollama_service is None:
         # 사용 가능한 모델 중 하나를 사용 (gemma3:4b, gemma2:2b, mistral:latest 순서)
-        import os
         model = os.getenv("OLLAMA_MODEL", "gemma3:4b")
         ollama_service = OllamaService(model=model)
     return ollama_service
 
 
-@router.post("/generate", response_model=GenerateResponse)
-async def generate_sentence(request: GenerateRequest):
+def submit_llm_call(func, *args) -> Optional[asyncio.Future]:
     """
-    선택된 단어들로 문장을 생성합니다.
-    
+    Ollama 호출을 전용 스레드 풀에서 실행합니다. (컨텍스트 변수 전파)
+    진행 중인 호출이 LLM_MAX_CONCURRENCY개면 대기열에 쌓지 않고 None을 반환합니다.
+    """
+    if not _llm_slots.acquire(blocking=False):
+        return None
+
+    context = contextvars.copy_context()
+    future = llm_executor.submit(context.run, func, *args)
+    # 실행 전에 취소된 작업도 슬롯을 돌려주도록 완료 콜백에서 해제
+    future.add_done_callback(lambda _: _llm_slots.release())
+    return asyncio.wrap_future(future)
+
+
+def get_sentence_builder(profile: Optional[str] = None) -> SentenceBuilder:
+    """프로필의 카테고리 테이블을 사용하는 규칙 기반 문장 조립기 인스턴스를 반환합니다."""
+    profile = get_profile_manager().resolve(profile)
+    if profile not in sentence_builders:
+        categories, _ = get_profile_manager().get_categories(profile)
+        sentence_builders[profile] = SentenceBuilder(categories)
+    return sentence_builders[profile]
+
+
+async def generate_within_budget(words: List[str], profile: Optional[str] = None) -> Tuple[str, str]:
+    """
+    규칙 기반 문장을 먼저 조립해 두고, Ollama 생성 결과가
+    GENERATE_LATENCY_BUDGET 안에 도착하면 그 결과를, 아니면
+    규칙 기반 문장을 반환합니다.
+
     Args:
-        request: 단어 목록을 포함한 요청
-    
+        words: 문장 생성에 사용할 단어 목록
+        profile: 규칙 기반 문장에 사용할 어휘 프로필
+
     Returns:
-        생성된 문장
-    
+        (생성된 문장, 생성 출처) 튜플
+
     Raises:
-        HTTPException: 문장 생성 실패 시
+        ValueError: 단어 목록이 비어있는 경우
     """
+    fallback = get_sentence_builder(profile).build_sentence(words)
+
+    if GENERATE_LATENCY_BUDGET <= 0:
+        return fallback, "rule"
+
     try:
         service = get_ollama_service()
-        
-        # 단어 목록 검증
-        if not request.words:
-            raise HTTPException(status_code=400, detail="단어 목록이 비어있습니다.")
-        
-        # 문장 생성
-        sentence = service.generate_sentence(request.words)
-        
-        return GenerateResponse(sentence=sentence)
-        
+        with span("generate.llm_race", budget_s=GENERATE_LATENCY_BUDGET):
+            future = submit_llm_call(service.generate_sentence, words)
+            if future is None:
+                logger.warning("Ollama executor saturated, returning rule-based sentence")
+                return fallback, "rule"
+            sentence = await asyncio.wait_for(future, timeout=GENERATE_LATENCY_BUDGET)
+        return sentence, "llm"
+
+    except asyncio.TimeoutError:
+        logger.warning(
+            f"Ollama exceeded latency budget ({GENERATE_LATENCY_BUDGET}s), "
+            "returning rule-based sentence"
+        )
+
     except ConnectionError as e:
         logger.error(f"Ollama connection error: {e}")
-        raise HTTPException(
-            status_code=503,
-            detail="Ollama 서버에 연결할 수 없습니다. localhost:11434에서 Ollama가 실행 중인지 확인해주세요."
-        )
-    
+
+    except Exception as e:
+        logger.error(f"Sentence generation error: {e}")
+
+    return fallback, "rule"
+
+
+@router.post("/generate", response_model=SourcedGenerateResponse)
+async def generate_sentence(request: GenerateRequest, profile: str = Depends(get_profile)):
+    """
+    선택된 단어들로 문장을 생성합니다.
+    지연 시간 예산을 넘기면 규칙 기반 문장을 반환합니다.
+
+    Args:
+        request: 단어 목록을 포함한 요청
+        profile: 어휘 프로필 이름
+
+    Returns:
+        생성된 문장과 생성 출처
+
+    Raises:
+        HTTPException: 단어 목록이 올바르지 않은 경우
+    """
+    # 단어 목록 검증
+    if not request.words:
+        raise HTTPException(status_code=400, detail="단어 목록이 비어있습니다.")
+
+    try:
+        sentence, source = await generate_within_budget(request.words, profile)
     except ValueError as e:
         logger.error(f"Validation error: {e}")
         raise HTTPException(status_code=400, detail=str(e))
-    
-    except Exception as e:
-        logger.error(f"Sentence generation error: {e}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"문장 생성 중 오류가 발생했습니다: {str(e)}"
-        )
+
+    # 문장으로 확정된 단어 순서에 추가 가중치 부여 (GENERATE_TRANSITION_WEIGHT > 0일 때만)
+    record_selections(request.words, profile, GENERATE_TRANSITION_WEIGHT)
+
+    return SourcedGenerateResponse(sentence=sentence, source=source)
@@ -0,0 +1,345 @@
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel, ValidationError
+from typing import Any, Dict, List, Optional, Type, TypeVar
+from models.schemas import GenerateRequest, RecommendRequest, TTSRequest
+from routers.words import (
+    GENERATE_TRANSITION_WEIGHT,
+    DiverseRecommendRequest,
+    get_faiss_service,
+    get_profile_manager,
+    recommend_for_word,
+    record_selections,
+)
+from routers.generate import (
+    GENERATE_LATENCY_BUDGET,
+    get_ollama_service,
+    get_sentence_builder,
+    submit_llm_call,
+)
+from routers.tts import get_tts_service, get_word_audio_archive
+from services import tracing
+import asyncio
+import json
+import logging
+import os
+import threading
+
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+RequestModel = TypeVar("RequestModel", bound=BaseModel)
+
+# 요청 본문이 아닌 메시지 공통 필드
+ENVELOPE_FIELDS = ("id", "op", "profile", "request_id")
+
+# 연결 하나에서 동시에 처리할 수 있는 요청 수
+SESSION_MAX_INFLIGHT = int(os.getenv("SESSION_MAX_INFLIGHT", "4"))
+
+
+class SessionChannel:
+    """
+    사용자 한 명의 WebSocket 세션 채널
+    하나의 연결 위에서 추천/생성/TTS 요청을 다중화하고,
+    선택된 단어 컨텍스트를 서버 측에 유지합니다.
+
+    어휘 프로필은 연결 시 ?profile= 쿼리로 지정하고, 메시지의 "profile" 필드로 바꿀 수 있습니다.
+    프로필 전환은 수신 순서대로 적용되며, 이미 처리 중인 요청은 이전 프로필을 그대로 사용합니다.
+    동시에 처리 중인 요청이 SESSION_MAX_INFLIGHT개를 넘으면 새 요청은 오류로 응답합니다.
+    각 작업의 본문은 HTTP 라우터와 같은 요청 모델로 검증하며, 검증 오류는 오류 프레임으로 응답합니다.
+
+    메시지 형식 (클라이언트 → 서버, JSON 텍스트 프레임):
+        {"id": 1, "op": "initial-words"}
+        {"id": 2, "op": "select", "word": "나"}
+        {"id": 3, "op": "recommend", "word": "나", "context": [...]}
+        {"id": 4, "op": "recommend-diverse", "exclude_words": [...]}
+        {"id": 5, "op": "generate", "words": [...]}
+        {"id": 6, "op": "tts", "text": "..."}
+        {"id": 7, "op": "reset"}
+        {"id": 8, "profile": "clinic"}  (op 없이 프로필만 전환)
+
+    메시지 형식 (서버 → 클라이언트):
+        {"id": 1, "type": "result", "op": "...", "data": {...}}
+        {"id": 5, "type": "token", "token": "..."}
+        {"id": 6, "type": "audio", "size": 12345}  (직후 MP3 바이너리 프레임)
+        {"id": 1, "type": "error", "detail": "..."}
+    """
+
+    def __init__(self, websocket: WebSocket, profile: Optional[str] = None):
+        self.websocket = websocket
+        self.profile = profile
+        self.context: List[str] = []
+        self.send_lock = asyncio.Lock()
+        self.tasks: set = set()
+        self.handlers = {
+            "initial-words": self._handle_initial_words,
+            "select": self._handle_select,
+            "recommend": self._handle_recommend,
+            "recommend-diverse": self._handle_recommend_diverse,
+            "generate": self._handle_generate,
+            "tts": self._handle_tts,
+            "reset": self._handle_reset,
+        }
+
+    async def send_json(self, payload: Dict[str, Any]) -> None:
+        """JSON 프레임을 전송합니다. (동시 전송 방지)"""
+        async with self.send_lock:
+            await self.websocket.send_text(json.dumps(payload, ensure_ascii=False))
+
+    async def send_result(self, msg_id: Any, op: str, data: Dict[str, Any]) -> None:
+        await self.send_json({"id": msg_id, "type": "result", "op": op, "data": data})
+
+    async def send_error(self, msg_id: Any, detail: str) -> None:
+        await self.send_json({"id": msg_id, "type": "error", "detail": detail})
+
+    async def run(self) -> None:
+        """수신 루프: 메시지마다 작업을 생성해 느린 요청이 다른 요청을 막지 않도록 합니다."""
+        try:
+            while True:
+                frame = await self.websocket.receive()
+                if frame["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(frame.get("code", 1000))
+
+                raw = frame.get("text")
+                if raw is None:
+                    await self.send_error(None, "텍스트(JSON) 프레임만 지원합니다.")
+                    continue
+
+                try:
+                    message = json.loads(raw)
+                except json.JSONDecodeError:
+                    await self.send_error(None, "잘못된 JSON 메시지입니다.")
+                    continue
+
+                if not isinstance(message, dict):
+                    await self.send_error(None, "메시지는 JSON 객체여야 합니다.")
+                    continue
+
+                msg_id = message.get("id")
+                if message.get("profile"):
+                    # 프로필 전환은 수신 순서대로 적용하고 선택 컨텍스트는 초기화
+                    try:
+                        self.profile = get_profile_manager().resolve(message["profile"])
+                    except (KeyError, ValueError):
+                        await self.send_error(msg_id, f"프로필을 찾을 수 없습니다: {message['profile']}")
+                        continue
+                    self.context.clear()
+                    if not message.get("op"):
+                        await self.send_result(msg_id, "profile", {"profile": self.profile})
+                        continue
+
+                if len(self.tasks) >= SESSION_MAX_INFLIGHT:
+                    await self.send_error(msg_id, "처리 중인 요청이 너무 많습니다. 잠시 후 다시 시도해주세요.")
+                    continue
+
+                task = asyncio.create_task(self._dispatch(message, self.profile))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+
+        except WebSocketDisconnect:
+            logger.info("Session channel disconnected")
+
+        finally:
+            # 처리 중인 작업을 취소하고, 닫힌 소켓으로 전송을 시도하지 않도록 끝날 때까지 대기
+            tasks = list(self.tasks)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _dispatch(self, message: Dict[str, Any], profile: str) -> None:
+        msg_id = message.get("id")
+        op = message.get("op")
+        handler = self.handlers.get(op)
+
+        if handler is None:
+            await self.send_error(msg_id, f"알 수 없는 작업입니다: {op}")
+            return
+
+        try:
+            if tracing.is_enabled():
+                # 메시지마다 별도 요청 ID로 트레이싱 (작업별 컨텍스트에만 적용됨)
+                with tracing.request_context(message.get("request_id")):
+                    with tracing.span(f"WS {op}"):
+                        await handler(msg_id, message, profile)
+            else:
+                await handler(msg_id, message, profile)
+        except (WebSocketDisconnect, asyncio.CancelledError):
+            raise
+        except ValueError as e:
+            logger.error(f"Validation error: {e}")
+            await self.send_error(msg_id, str(e))
+        except Exception as e:
+            logger.error(f"Session operation '{op}' failed: {e}")
+            await self.send_error(msg_id, f"요청 처리 중 오류가 발생했습니다: {str(e)}")
+
+    @staticmethod
+    def _parse(model: Type[RequestModel], message: Dict[str, Any], **defaults: Any) -> RequestModel:
+        """
+        메시지 본문을 HTTP 라우터와 같은 요청 모델로 검증합니다.
+
+        Args:
+            model: 요청 스키마
+            message: 수신한 메시지
+            **defaults: 메시지에 값이 없을 때 사용할 필드 값 (예: 서버 측 컨텍스트)
+
+        Raises:
+            ValueError: 검증에 실패한 경우 (오류 프레임으로 전달됨)
+        """
+        payload = {key: value for key, value in message.items() if key not in ENVELOPE_FIELDS}
+        for key, value in defaults.items():
+            if not payload.get(key):
+                payload[key] = value
+        try:
+            return model.model_validate(payload)
+        except ValidationError as e:
+            detail = "; ".join(
+                f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()
+            )
+            raise ValueError(f"잘못된 요청입니다: {detail}")
+
+    async def _run_blocking(self, func, *args):
+        """동기 서비스 호출을 스레드 풀에서 실행합니다. (컨텍스트 변수 전파)"""
+        return await asyncio.to_thread(func, *args)
+
+    async def _handle_initial_words(self, msg_id: Any, message: Dict[str, Any], profile: str) -> None:
+        service = await self._run_blocking(get_faiss_service, profile)
+        words = await self._run_blocking(service.get_initial_words, 4)
+        await self.send_result(msg_id, "initial-words", {"words": words})
+
+    async def _handle_select(self, msg_id: Any, message: Dict[str, Any], profile: str) -> None:
+        """단어 선택을 컨텍스트에 기록하고 다음 추천 단어를 푸시합니다."""
+        word = self._parse(RecommendRequest, message, context=list(self.context)).word
+        if not word:
+            raise ValueError("선택한 단어가 비어있습니다.")
+
+        context = list(self.context)
+        self.context.append(word)
+        recommendations = await self._run_blocking(recommend_for_word, word, context, profile)
+        if context:
+            record_selections([context[-1], word], profile)
+        await self.send_result(msg_id, "recommend", {
+            "recommendations": recommendations,
+            "context": list(self.context),
+        })
+
+    async def _handle_recommend(self, msg_id: Any, message: Dict[str, Any], profile: str) -> None:
+        request = self._parse(RecommendRequest, message, context=list(self.context))
+        if not request.word:
+            raise ValueError("추천 기준 단어가 비어있습니다.")
+
+        recommendations = await self._run_blocking(recommend_for_word, request.word, request.context, profile)
+        await self.send_result(msg_id, "recommend", {"recommendations": recommendations})
+
+    async def _handle_recommend_diverse(self, msg_id: Any, message: Dict[str, Any], profile: str) -> None:
+        request = self._parse(DiverseRecommendRequest, message, context=list(self.context))
+        exclude_set = set(request.exclude_words) | set(request.context)
+        service = await self._run_blocking(get_faiss_service, profile)
+        recommendations = await self._run_blocking(service.recommend_diverse_words, 4, exclude_set)
+        await self.send_result(msg_id, "recommend-diverse", {"recommendations": recommendations})
+
+    async def _handle_reset(self, msg_id: Any, message: Dict[str, Any], profile: str) -> None:
+        self.context.clear()
+        await self.send_result(msg_id, "reset", {"context": []})
+
+    async def _handle_tts(self, msg_id: Any, message: Dict[str, Any], profile: str) -> None:
+        """MP3 오디오를 헤더 프레임 + 바이너리 프레임으로 전송합니다."""
+        text = self._parse(TTSRequest, message).text
+        clip = get_word_audio_archive().get_clip(text.strip())
+        if clip is not None:
+            # 단어 하나는 사전 합성된 클립으로 즉시 응답
+            audio_data = bytes(clip)
+        else:
+            service = get_tts_service()
+            audio_data = await self._run_blocking(service.text_to_speech, text)
+
+        async with self.send_lock:
+            await self.websocket.send_text(json.dumps(
+                {"id": msg_id, "type": "audio", "size": len(audio_data)}
+            ))
+            await self.websocket.send_bytes(audio_data)
+
+    async def _handle_generate(self, msg_id: Any, message: Dict[str, Any], profile: str) -> None:
+        """
+        문장을 생성하면서 토큰을 푸시합니다.
+        GENERATE_LATENCY_BUDGET 안에 생성이 끝나지 않으면 규칙 기반 문장으로 마무리합니다.
+        """
+        words = self._parse(GenerateRequest, message, words=list(self.context)).words
+        fallback = get_sentence_builder(profile).build_sentence(words)
+
+        # select에서 이미 쌍마다 기록했으므로 추가 가중치만 반영
+        record_selections(words, profile, GENERATE_TRANSITION_WEIGHT)
+
+        sentence = None
+        if GENERATE_LATENCY_BUDGET > 0:
+            sentence = await self._stream_generate(msg_id, words)
+
+        if sentence:
+            await self.send_result(msg_id, "generate", {"sentence": sentence, "source": "llm"})
+        else:
+            await self.send_result(msg_id, "generate", {"sentence": fallback, "source": "rule"})
+
+    async def _stream_generate(self, msg_id: Any, words: List[str]) -> Optional[str]:
+        """Ollama 스트리밍 토큰을 전달하고, 기한 내에 완성된 문장을 반환합니다."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def worker():
+            try:
+                service = get_ollama_service()
+                for token in service.generate_sentence_stream(words):
+                    if stop.is_set():
+                        return
+                    loop.call_soon_threadsafe(queue.put_nowait, ("token", token))
+                loop.call_soon_threadsafe(queue.put_nowait, ("done", None))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, ("error", e))
+
+        if submit_llm_call(worker) is None:
+            logger.warning("Ollama executor saturated, returning rule-based sentence")
+            return None
+
+        deadline = loop.time() + GENERATE_LATENCY_BUDGET
+        tokens: List[str] = []
+
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+
+                kind, value = await asyncio.wait_for(queue.get(), timeout=remaining)
+                if kind == "token":
+                    tokens.append(value)
+                    await self.send_json({"id": msg_id, "type": "token", "token": value})
+                elif kind == "done":
+                    return "".join(tokens).strip() or None
+                else:
+                    logger.error(f"Sentence generation error: {value}")
+                    return None
+
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Ollama exceeded latency budget ({GENERATE_LATENCY_BUDGET}s), "
+                "returning rule-based sentence"
+            )
+            return None
+
+        finally:
+            stop.set()
+
+
+@router.websocket("/ws")
+async def session_channel(websocket: WebSocket, profile: Optional[str] = Query(None)):
+    """
+    사용자 세션용 WebSocket 엔드포인트
+    추천/생성/TTS 요청을 하나의 연결로 주고받습니다.
+    """
+    try:
+        profile = get_profile_manager().resolve(profile)
+    except (KeyError, ValueError):
+        await websocket.close(code=1008)
+        return
+
+    await websocket.accept()
+    await SessionChannel(websocket, profile).run()
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from models.schemas import TTSRequest
 from services.tts_service import TTSService
+from services.word_audio import WordAudioArchive
+import asyncio
 import logging
 
 
@@ -11,6 +13,18 @@ router = APIRouter()
 # TTS 서비스 싱글톤 인스턴스
 _tts_service: TTSService = None
 
+# 단어 음성 아카이브 싱글톤 인스턴스
+_word_audio_archive: WordAudioArchive = None
+
+
+class ClipResponse(Response):
+    """메모리 매핑된 클립을 복사하지 않고 그대로 전송하는 응답"""
+
+    def render(self, content) -> bytes:
+        if isinstance(content, memoryview):
+            return content
+        return super().render(content)
+
 
 def get_tts_service() -> TTSService:
     """
@@ -22,6 +36,16 @@ def get_tts_service() -> TTSService:
     return _tts_service
 
 
+def get_word_audio_archive() -> WordAudioArchive:
+    """
+    단어 음성 아카이브 인스턴스를 반환합니다 (의존성 주입용).
+    """
+    global _word_audio_archive
+    if _word_audio_archive is None:
+        _word_audio_archive = WordAudioArchive()
+    return _word_audio_archive
+
+
 @router.post("/tts")
 async def text_to_speech(
     request: TTSRequest,
@@ -65,3 +89,57 @@ async def text_to_speech(
             status_code=500,
             detail=f"음성 생성 중 오류가 발생했습니다: {str(e)}"
         )
+
+
+@router.get("/tts/word/{word}")
+async def word_to_speech(
+    word: str,
+    archive: WordAudioArchive = Depends(get_word_audio_archive),
+    tts_service: TTSService = Depends(get_tts_service)
+):
+    """
+    단어 하나의 음성을 반환합니다.
+    사전 합성된 아카이브에 있으면 메모리 매핑된 클립을 그대로 보내고,
+    없으면 TTS로 합성합니다. (합성은 스레드 풀에서 실행)
+    
+    Args:
+        word: 음성으로 변환할 단어
+        archive: 단어 음성 아카이브
+        tts_service: TTS 서비스 인스턴스
+    
+    Returns:
+        Response: MP3 형식의 오디오
+    
+    Raises:
+        HTTPException: 음성 생성 실패 시
+    """
+    clip = archive.get_clip(word)
+    if clip is not None:
+        return ClipResponse(
+            clip,
+            media_type="audio/mpeg",
+            headers={
+                "Cache-Control": "public, max-age=86400",
+                "X-Audio-Source": "archive",
+            }
+        )
+    
+    try:
+        logger.info(f"Word not in audio archive, synthesizing: {word}")
+        audio_data = await asyncio.to_thread(tts_service.text_to_speech, word)
+        return Response(
+            audio_data,
+            media_type="audio/mpeg",
+            headers={"X-Audio-Source": "tts"}
+        )
+        
+    except ValueError as e:
+        logger.error(f"Validation error: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    except Exception as e:
+        logger.error(f"TTS generation failed: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"음성 생성 중 오류가 발생했습니다: {str(e)}"
+        )
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from pydantic import BaseModel
 from typing import List, Optional
 from models.schemas import RecommendRequest, RecommendResponse, InitialWordsResponse
 from services.faiss_service import FAISSService
+from services.profile_service import ProfileManager
+from services.tracing import span
+import asyncio
+import os
 
 router = APIRouter()
 
-# FAISS 서비스 인스턴스 (싱글톤)
-faiss_service: FAISSService = None
+# 어휘 프로필 관리자 인스턴스 (싱글톤, 프로필별 FAISS 서비스 보유)
+profile_manager: ProfileManager = None
+
+# 문장 생성 시 확정된 단어 순서에 더할 전이 가중치
+# 단어를 고를 때(/recommend, WS select) 이미 쌍마다 한 번씩 기록되므로 기본값 0이면 다시 집계하지 않음
+GENERATE_TRANSITION_WEIGHT = float(os.getenv("GENERATE_TRANSITION_WEIGHT", "0"))
 
 
 class DiverseRecommendRequest(BaseModel):
@@ -16,19 +24,88 @@ class DiverseRecommendRequest(BaseModel):
     exclude_words: List[str] = []
 
 
-def get_faiss_service() -> FAISSService:
-    """FAISS 서비스 인스턴스를 반환합니다."""
-    global faiss_service
-    if faiss_service is None:
-        faiss_service = FAISSService()
-    return faiss_service
+def get_profile_manager() -> ProfileManager:
+    """어휘 프로필 관리자 인스턴스를 반환합니다."""
+    global profile_manager
+    if profile_manager is None:
+        profile_manager = ProfileManager()
+    return profile_manager
+
+
+def get_profile(
+    profile: Optional[str] = Query(None),
+    x_profile: Optional[str] = Header(None)
+) -> str:
+    """
+    요청의 어휘 프로필 이름을 반환합니다 (의존성 주입용).
+    ?profile= 쿼리 또는 X-Profile 헤더로 지정하며, 없으면 default 프로필을 사용합니다.
+    """
+    try:
+        return get_profile_manager().resolve(profile or x_profile)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"프로필을 찾을 수 없습니다: {profile or x_profile}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def get_faiss_service(profile: Optional[str] = None) -> FAISSService:
+    """프로필의 FAISS 서비스 인스턴스를 반환합니다."""
+    return get_profile_manager().get(profile)
+
+
+def recommend_for_word(word: str, context: List[str], profile: Optional[str] = None) -> List[str]:
+    """선택된 단어와 컨텍스트로 다음 4개의 단어를 추천합니다."""
+    service = get_faiss_service(profile)
+    
+    # 단어가 어휘에 없는 경우 처리
+    if not service.word_exists(word):
+        # 어휘에 없는 단어면 초기 단어 반환
+        return service.get_initial_words(k=4)
+    
+    # 컨텍스트를 고려한 추천
+    with span("faiss.recommend_words", word=word, context_size=len(context)):
+        return service.recommend_words(
+            word, 
+            k=4, 
+            context=context,
+            exclude_words=set(context)
+        )
+
+
+def record_selections(words: List[str], profile: Optional[str] = None, weight: float = 1.0) -> None:
+    """
+    연속으로 선택된 단어들을 전이 테이블에 기록합니다.
+    프로필이 아직 로드되지 않았거나 가중치가 0 이하이면 기록하지 않습니다.
+    """
+    if profile_manager is None or len(words) < 2 or weight <= 0:
+        return
+    service = profile_manager.get_loaded(profile)
+    if service is not None:
+        service.transitions.record_sequence(words, weight)
+
+
+def save_transitions() -> None:
+    """로드된 모든 프로필의 전이 테이블을 저장합니다. (서버 종료 시 호출)"""
+    if profile_manager is not None:
+        profile_manager.save_all()
+
+
+@router.get("/profiles")
+async def list_profiles():
+    """사용 가능한 어휘 프로필 목록을 반환합니다."""
+    manager = get_profile_manager()
+    return {
+        "profiles": manager.list_profiles(),
+        "loaded": list(manager.loaded.keys()),
+    }
 
 
 @router.get("/initial-words", response_model=InitialWordsResponse)
-async def get_initial_words():
+async def get_initial_words(profile: str = Depends(get_profile)):
     """초기 4개의 시작 단어를 반환합니다."""
     try:
-        service = get_faiss_service()
+        # 처음 요청된 프로필은 로드(인코딩)에 시간이 걸리므로 스레드 풀에서 실행
+        service = await asyncio.to_thread(get_faiss_service, profile)
         words = service.get_initial_words(k=4)
         return InitialWordsResponse(words=words)
     except Exception as e:
@@ -36,24 +113,16 @@ async def get_initial_words():
 
 
 @router.post("/recommend", response_model=RecommendResponse)
-async def recommend_words(request: RecommendRequest):
+async def recommend_words(request: RecommendRequest, profile: str = Depends(get_profile)):
     """선택된 단어를 기반으로 다음 4개의 단어를 추천합니다."""
     try:
-        service = get_faiss_service()
+        context = request.context if hasattr(request, 'context') and request.context else []
+        recommendations = await asyncio.to_thread(recommend_for_word, request.word, context, profile)
         
-        # 단어가 어휘에 없는 경우 처리
-        if not service.word_exists(request.word):
-            # 어휘에 없는 단어면 초기 단어 반환
-            recommendations = service.get_initial_words(k=4)
-        else:
-            # 컨텍스트를 고려한 추천
-            context = request.context if hasattr(request, 'context') and request.context else []
-            recommendations = service.recommend_words(
-                request.word, 
-                k=4, 
-                context=context,
-                exclude_words=set(context)
-            )
+        # 직전에 선택한 단어 → 이번 단어 전이 기록 (컨텍스트 끝에 이번 단어가 포함될 수 있음)
+        previous = context[:-1] if context and context[-1] == request.word else context
+        if previous:
+            record_selections([previous[-1], request.word], profile)
         
         return RecommendResponse(recommendations=recommendations)
     except Exception as e:
@@ -61,10 +130,10 @@ async def recommend_words(request: RecommendRequest):
 
 
 @router.post("/recommend-diverse", response_model=RecommendResponse)
-async def recommend_diverse_words(request: DiverseRecommendRequest):
+async def recommend_diverse_words(request: DiverseRecommendRequest, profile: str = Depends(get_profile)):
     """경계를 넘어갈 때 다양한 카테고리에서 단어를 추천합니다."""
     try:
-        service = get_faiss_service()
+        service = await asyncio.to_thread(get_faiss_service, profile)
         
         exclude_set = set(request.exclude_words + request.context)
         recommendations = service.recommend_diverse_words(k=4, exclude_words=exclude_set)
@@ -2,5 +2,7 @@
 from .faiss_service import FAISSService
 from .ollama_service import OllamaService
 from .tts_service import TTSService
+from .sentence_builder import SentenceBuilder
+from .profile_service import ProfileManager
 
-__all__ = ['FAISSService', 'OllamaService', 'TTSService']
+__all__ = ['FAISSService', 'OllamaService', 'TTSService', 'SentenceBuilder', 'ProfileManager']
@@ -2,8 +2,15 @@ import faiss
 import numpy as np
 from sentence_transformers import SentenceTransformer
 from typing import List, Optional, Dict, Set
+import glob
+import hashlib
 import os
 import random
+import re
+import tempfile
+
+from .tracing import span
+from .transition_service import TRANSITION_MIN_STRENGTH, TransitionTable
 
 
 # 단어 카테고리 정의 (연관성 높은 추천을 위해) - 확장된 버전
@@ -22,6 +29,9 @@ WORD_CATEGORIES: Dict[str, List[str]] = {
     "필요": ["필요하다", "원하다", "싶다", "해야하다", "할수있다", "못하다", "안하다"],
 }
 
+# 감쇠된 전이 이벤트가 이만큼 쌓인 단어는 사용 기록만으로 추천을 채움 (인코딩/검색 생략)
+TRANSITION_HOT_STRENGTH = float(os.getenv("TRANSITION_HOT_STRENGTH", "20"))
+
 # 카테고리 간 연관성 정의 (자연스러운 문장 구성을 위해)
 CATEGORY_RELATIONS: Dict[str, List[str]] = {
     "인사": ["사람", "시간", "감정"],
@@ -46,25 +56,43 @@ class FAISSService:
     """
     
     def __init__(self, model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2", 
-                 vocabulary_file: str = "data/vocabulary.txt"):
+                 vocabulary_file: str = "data/vocabulary.txt",
+                 transitions_file: Optional[str] = None,
+                 model: Optional[SentenceTransformer] = None,
+                 categories: Optional[Dict[str, List[str]]] = None,
+                 category_relations: Optional[Dict[str, List[str]]] = None):
         """
         FAISS 서비스 초기화
         
         Args:
             model_name: 사용할 sentence-transformers 모델명
             vocabulary_file: 단어 어휘 파일 경로
+            transitions_file: 단어 전이 테이블 저장 경로 (기본값: 어휘 파일 옆 .transitions.npz)
+            model: 공유할 임베딩 모델 인스턴스 (없으면 model_name으로 로드)
+            categories: 단어 카테고리 정의 (기본값: WORD_CATEGORIES)
+            category_relations: 카테고리 간 연관성 정의 (기본값: CATEGORY_RELATIONS)
         """
-        print(f"Loading embedding model: {model_name}")
-        self.model = SentenceTransformer(model_name)
+        if model is None:
+            print(f"Loading embedding model: {model_name}")
+            model = SentenceTransformer(model_name)
+        self.model = model
+        self.model_name = model_name
         self.vocabulary_file = vocabulary_file
         self.vocabulary: List[str] = []
         self.index: Optional[faiss.Index] = None
         self.embeddings: Optional[np.ndarray] = None
+        self.word_categories = categories if categories is not None else WORD_CATEGORIES
+        self.category_relations = category_relations if category_relations is not None else CATEGORY_RELATIONS
         
         # 어휘 로드 및 인덱스 구축
         self._load_vocabulary()
         self.build_index()
         
+        # 사용 기록 기반 전이 테이블
+        if transitions_file is None:
+            transitions_file = os.path.splitext(vocabulary_file)[0] + ".transitions.npz"
+        self.transitions = TransitionTable(self.vocabulary, path=transitions_file)
+        
     def _load_vocabulary(self) -> None:
         """
         어휘 파일에서 단어 목록을 로드합니다.
@@ -76,44 +104,121 @@ class FAISSService:
             self.vocabulary = [line.strip() for line in f if line.strip()]
         
         print(f"Loaded {len(self.vocabulary)} words from vocabulary")
+    
+    def _cache_path(self) -> str:
+        """
+        임베딩 캐시 파일 경로를 반환합니다.
+        모델명과 어휘 내용의 해시를 파일명에 포함하므로 어휘가 바뀌면 새로 만들어집니다.
+        """
+        digest = hashlib.sha1(
+            (self.model_name + "\n" + "\n".join(self.vocabulary)).encode("utf-8")
+        ).hexdigest()[:12]
+        stem = os.path.splitext(self.vocabulary_file)[0]
+        return f"{stem}.{digest}.npy"
+    
+    def _remove_stale_caches(self, current_path: str) -> None:
+        """같은 어휘 파일의 이전 해시 임베딩 캐시 파일을 삭제합니다."""
+        stem = os.path.splitext(self.vocabulary_file)[0]
+        for path in glob.glob(glob.escape(stem) + ".*.npy"):
+            digest = os.path.basename(path)[len(os.path.basename(stem)) + 1:].rsplit(".", 1)[0]
+            if path == current_path or not re.fullmatch(r"[0-9a-f]{12}", digest):
+                continue
+            try:
+                os.remove(path)
+                print(f"Removed stale embedding cache: {path}")
+            except OSError as e:
+                print(f"Failed to remove stale embedding cache {path}: {e}")
         
     def build_index(self) -> None:
         """
         단어 목록으로 FAISS 인덱스를 구축합니다.
         모든 단어의 임베딩을 생성하고 L2 거리 기반 인덱스를 만듭니다.
+        임베딩 캐시 파일이 있으면 인코딩을 건너뜁니다. self.embeddings는 캐시 파일을
+        메모리 매핑으로 참조하지만, IndexFlatL2는 벡터를 복사해 보관하므로 인덱스 자체는 메모리에 올라갑니다.
         """
         if not self.vocabulary:
             raise ValueError("Vocabulary is empty. Cannot build index.")
         
-        print("Generating embeddings for vocabulary...")
-        # 모든 단어의 임베딩 생성
-        self.embeddings = self.model.encode(self.vocabulary, show_progress_bar=True)
+        embeddings_path = self._cache_path()
+        cached = False
+        if os.path.exists(embeddings_path):
+            try:
+                self.embeddings = np.load(embeddings_path, mmap_mode='r')
+                cached = self.embeddings.shape[0] == len(self.vocabulary)
+                if not cached:
+                    print("Embedding cache does not match vocabulary, rebuilding")
+            except (OSError, ValueError) as e:
+                print(f"Failed to load embedding cache, rebuilding: {e}")
+        
+        if not cached:
+            print("Generating embeddings for vocabulary...")
+            # 모든 단어의 임베딩 생성
+            self.embeddings = self.model.encode(self.vocabulary, show_progress_bar=True).astype('float32')
         
         # FAISS 인덱스 생성 (L2 거리 기반)
         dimension = self.embeddings.shape[1]
         self.index = faiss.IndexFlatL2(dimension)
         
         # 인덱스에 임베딩 추가
-        self.index.add(self.embeddings.astype('float32'))
+        self.index.add(np.ascontiguousarray(self.embeddings, dtype='float32'))
         
         print(f"FAISS index built with {self.index.ntotal} vectors")
         
+        if cached:
+            return
+        
+        # 다음 로드를 위해 임베딩 캐시 저장 (고유한 임시 파일에 쓴 뒤 교체)
+        directory, name = os.path.split(os.path.abspath(embeddings_path))
+        fd, tmp_path = tempfile.mkstemp(prefix=name + ".", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, self.embeddings)
+            os.replace(tmp_path, embeddings_path)
+            # 인코딩 결과를 인덱스 복사본과 함께 들고 있지 않도록 캐시 파일 매핑으로 교체
+            self.embeddings = np.load(embeddings_path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            print(f"Failed to write embedding cache: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self._remove_stale_caches(embeddings_path)
+    
+    def memory_usage(self) -> int:
+        """
+        프로필이 힙에 올려 둔 대략적인 메모리 크기(바이트)를 반환합니다.
+        메모리 매핑된 임베딩 캐시는 페이지 캐시로 회수될 수 있으므로 포함하지 않습니다.
+        
+        Returns:
+            인덱스 벡터, 매핑되지 않은 임베딩, 전이 테이블 크기의 합
+        """
+        size = 0
+        if self.index is not None:
+            size += self.index.ntotal * self.index.d * 4
+        if self.embeddings is not None and not isinstance(self.embeddings, np.memmap):
+            size += self.embeddings.nbytes
+        transitions = self.transitions
+        size += (transitions.data.nbytes + transitions.indices.nbytes
+                 + transitions.indptr.nbytes + transitions.row_totals.nbytes)
+        return size
+        
     def _get_word_category(self, word: str) -> Optional[str]:
         """단어가 속한 카테고리를 찾습니다."""
-        for category, words in WORD_CATEGORIES.items():
+        for category, words in self.word_categories.items():
             if word in words:
                 return category
         return None
     
     def _get_category_words(self, category: str) -> List[str]:
         """카테고리에 속한 단어들 중 어휘에 있는 것만 반환합니다."""
-        if category not in WORD_CATEGORIES:
+        if category not in self.word_categories:
             return []
-        return [w for w in WORD_CATEGORIES[category] if w in self.vocabulary]
+        return [w for w in self.word_categories[category] if w in self.vocabulary]
 
     def _get_related_categories(self, category: str) -> List[str]:
         """카테고리와 연관된 다른 카테고리들을 반환합니다."""
-        return CATEGORY_RELATIONS.get(category, [])
+        return self.category_relations.get(category, [])
 
     def recommend_words(self, word: str, k: int = 4, exclude_word: bool = True, 
                        context: List[str] = None, exclude_words: Set[str] = None) -> List[str]:
@@ -145,6 +250,18 @@ class FAISSService:
         
         recommended_words = []
         
+        # 0. 사용 기록 기반 추천 (이 단어 다음에 실제로 많이 선택된 단어)
+        #    기록이 충분히 쌓인 단어는 전이 테이블만으로 k개를 채워 인코딩/검색을 생략하고,
+        #    감쇠되어 TRANSITION_MIN_STRENGTH보다 약해진 기록은 사용하지 않음
+        transition_strength = self.transitions.strength(word)
+        if transition_strength >= TRANSITION_MIN_STRENGTH:
+            learned_slots = k if transition_strength >= TRANSITION_HOT_STRENGTH else k // 2
+            for candidate in self.transitions.top_next(
+                word, learned_slots, words_to_exclude, min_strength=TRANSITION_MIN_STRENGTH
+            ):
+                recommended_words.append(candidate)
+                words_to_exclude.add(candidate)
+        
         # 1. 같은 카테고리에서 1개 추천 (연관성 높은 단어)
         word_category = self._get_word_category(word)
         if word_category:
@@ -172,10 +289,12 @@ class FAISSService:
         # 3. 컨텍스트 기반 추천 (이미 선택된 단어들과 유사한 단어)
         if context and len(recommended_words) < k:
             # 컨텍스트 단어들의 평균 임베딩으로 검색
-            context_embedding = self.model.encode(context)
-            avg_context_embedding = np.mean(context_embedding, axis=0, keepdims=True)
+            with span("faiss.encode", stage="context", size=len(context)):
+                context_embedding = self.model.encode(context)
+                avg_context_embedding = np.mean(context_embedding, axis=0, keepdims=True)
             
-            _, context_indices = self.index.search(avg_context_embedding.astype('float32'), k * 3)
+            with span("faiss.search", stage="context"):
+                _, context_indices = self.index.search(avg_context_embedding.astype('float32'), k * 3)
             
             for idx in context_indices[0]:
                 if idx < len(self.vocabulary):
@@ -188,9 +307,11 @@ class FAISSService:
         
         # 4. 입력 단어 기반 유사도 검색으로 나머지 채우기
         if len(recommended_words) < k:
-            query_embedding = self.model.encode([word])
+            with span("faiss.encode", stage="word", size=1):
+                query_embedding = self.model.encode([word])
             search_k = k * 4  # 충분히 많이 검색
-            _, indices = self.index.search(query_embedding.astype('float32'), search_k)
+            with span("faiss.search", stage="word"):
+                _, indices = self.index.search(query_embedding.astype('float32'), search_k)
             
             for idx in indices[0]:
                 if idx < len(self.vocabulary):
@@ -225,7 +346,7 @@ class FAISSService:
         recommended = []
         
         # 각 카테고리에서 하나씩 선택
-        categories = list(WORD_CATEGORIES.keys())
+        categories = list(self.word_categories.keys())
         random.shuffle(categories)
         
         for category in categories:
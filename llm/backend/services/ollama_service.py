@@ -1,14 +1,19 @@
 import ollama
 import os
-from typing import List
+from typing import Iterator, List
 import logging
 
+from .tracing import span
+
 
 logger = logging.getLogger(__name__)
 
 # 환경변수에서 Ollama 호스트 읽기 (도커용)
 OLLAMA_HOST = os.getenv("OLLAMA_HOST", "localhost:11434")
 
+# Ollama HTTP 요청 타임아웃 (초). 응답 없는 호출이 작업 스레드를 계속 점유하지 않도록 함
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "30"))
+
 
 class OllamaService:
     """
@@ -16,17 +21,20 @@ class OllamaService:
     선택된 단어들을 자연스러운 한국어 문장으로 변환합니다.
     """
     
-    def __init__(self, base_url: str = f"http://{OLLAMA_HOST}", model: str = "gemma2:2b"):
+    def __init__(self, base_url: str = f"http://{OLLAMA_HOST}", model: str = "gemma2:2b",
+                 timeout: float = OLLAMA_TIMEOUT):
         """
         Ollama 서비스 초기화
         
         Args:
             base_url: Ollama 서버 URL
             model: 사용할 모델명 (기본값: gemma2:2b)
+            timeout: 요청 타임아웃 (초)
         """
         self.base_url = base_url
         self.model = model
-        self.client = ollama.Client(host=base_url)
+        self.timeout = timeout
+        self.client = ollama.Client(host=base_url, timeout=timeout)
         
         logger.info(f"OllamaService initialized with model: {model} at {base_url}")
         
@@ -66,13 +74,12 @@ class OllamaService:
         return prompt
 
     
-    def generate_sentence(self, words: List[str], timeout: int = 10) -> str:
+    def generate_sentence(self, words: List[str]) -> str:
         """
         단어 목록으로 자연스러운 문장을 생성합니다.
         
         Args:
             words: 문장 생성에 사용할 단어 목록
-            timeout: 요청 타임아웃 (초)
         
         Returns:
             생성된 문장
@@ -93,16 +100,17 @@ class OllamaService:
             logger.info(f"Generating sentence for words: {words}")
             
             # Ollama API 호출
-            response = self.client.generate(
-                model=self.model,
-                prompt=prompt,
-                options={
-                    'temperature': 0.7,
-                    'max_tokens': 100,
-                    'top_p': 0.9,
-                },
-                stream=False
-            )
+            with span("ollama.generate_sentence", model=self.model, word_count=len(words)):
+                response = self.client.generate(
+                    model=self.model,
+                    prompt=prompt,
+                    options={
+                        'temperature': 0.7,
+                        'max_tokens': 100,
+                        'top_p': 0.9,
+                    },
+                    stream=False
+                )
             
             # 응답에서 문장 추출
             generated_text = response.get('response', '').strip()
@@ -129,6 +137,58 @@ class OllamaService:
             logger.error(f"Unexpected error during sentence generation: {e}")
             raise Exception(f"문장 생성 중 예상치 못한 오류가 발생했습니다: {str(e)}")
     
+    def generate_sentence_stream(self, words: List[str]) -> Iterator[str]:
+        """
+        단어 목록으로 문장을 생성하면서 토큰 단위로 반환합니다.
+        
+        Args:
+            words: 문장 생성에 사용할 단어 목록
+        
+        Yields:
+            생성된 토큰 문자열
+        
+        Raises:
+            ConnectionError: Ollama 서버에 연결할 수 없는 경우
+            ValueError: 단어 목록이 비어있는 경우
+            Exception: 기타 생성 오류
+        """
+        if not words:
+            raise ValueError("단어 목록이 비어있습니다.")
+        
+        try:
+            prompt = self._create_prompt(words)
+            
+            logger.info(f"Streaming sentence for words: {words}")
+            
+            with span("ollama.generate_sentence_stream", model=self.model, word_count=len(words)) as stream_span:
+                token_count = 0
+                for chunk in self.client.generate(
+                    model=self.model,
+                    prompt=prompt,
+                    options={
+                        'temperature': 0.7,
+                        'max_tokens': 100,
+                        'top_p': 0.9,
+                    },
+                    stream=True
+                ):
+                    token = chunk.get('response', '')
+                    if token:
+                        token_count += 1
+                        stream_span.set_attribute('tokens', token_count)
+                        yield token
+                
+        except ollama.ResponseError as e:
+            logger.error(f"Ollama response error: {e}")
+            raise Exception(f"문장 생성 중 오류가 발생했습니다: {str(e)}")
+        
+        except ollama.RequestError as e:
+            logger.error(f"Ollama request error: {e}")
+            raise ConnectionError(
+                f"Ollama 서버({self.base_url})에 연결할 수 없습니다. "
+                "Ollama가 실행 중인지 확인해주세요."
+            )
+    
     def check_connection(self) -> bool:
         """
         Ollama 서버 연결 상태를 확인합니다.
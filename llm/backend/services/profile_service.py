@@ -0,0 +1,199 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import threading
+
+from sentence_transformers import SentenceTransformer
+
+from .faiss_service import FAISSService, WORD_CATEGORIES, CATEGORY_RELATIONS
+
+
+logger = logging.getLogger(__name__)
+
+# 환경변수 설정
+DEFAULT_PROFILE = "default"
+PROFILES_DIR = os.getenv("PROFILES_DIR", "data/profiles")
+PROFILE_MEMORY_BUDGET_MB = float(os.getenv("PROFILE_MEMORY_BUDGET_MB", "512"))
+EMBEDDING_MODEL = os.getenv(
+    "EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+)
+
+
+class ProfileManager:
+    """
+    어휘 프로필 관리자
+    프로필마다 별도의 어휘/인덱스/카테고리 테이블을 가진 FAISSService를 두고,
+    임베딩 모델은 모든 프로필이 하나의 인스턴스를 공유합니다.
+    프로필은 처음 요청될 때 로드되며, 메모리 예산을 넘으면 가장 오래 사용하지 않은 프로필부터 해제합니다.
+
+    디렉터리 구조:
+        data/vocabulary.txt                       (default 프로필)
+        data/profiles/<name>/vocabulary.txt       (이름별 프로필)
+        data/profiles/<name>/categories.json      (선택: {"categories": {...}, "relations": {...}})
+    """
+
+    def __init__(self, profiles_dir: str = PROFILES_DIR,
+                 default_vocabulary: str = "data/vocabulary.txt",
+                 memory_budget_mb: float = PROFILE_MEMORY_BUDGET_MB,
+                 model_name: str = EMBEDDING_MODEL):
+        """
+        프로필 관리자 초기화
+
+        Args:
+            profiles_dir: 이름별 프로필 디렉터리
+            default_vocabulary: default 프로필의 어휘 파일 경로
+            memory_budget_mb: 로드된 프로필 인덱스의 메모리 예산 (MB)
+            model_name: 공유 임베딩 모델명
+        """
+        self.profiles_dir = profiles_dir
+        self.default_vocabulary = default_vocabulary
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.model_name = model_name
+        self.model = None
+
+        self.loaded: "OrderedDict[str, FAISSService]" = OrderedDict()
+        self._categories: Dict[str, Tuple[Dict[str, List[str]], Dict[str, List[str]]]] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.RLock()
+
+    def list_profiles(self) -> List[str]:
+        """사용 가능한 프로필 이름 목록을 반환합니다."""
+        names = [DEFAULT_PROFILE]
+        if os.path.isdir(self.profiles_dir):
+            for name in sorted(os.listdir(self.profiles_dir)):
+                if name != DEFAULT_PROFILE and os.path.exists(self._vocabulary_path(name)):
+                    names.append(name)
+        return names
+
+    def _vocabulary_path(self, name: str) -> str:
+        if name == DEFAULT_PROFILE:
+            return self.default_vocabulary
+        return os.path.join(self.profiles_dir, name, "vocabulary.txt")
+
+    def resolve(self, name: Optional[str]) -> str:
+        """프로필 이름을 검증하고 정규화합니다."""
+        name = name or DEFAULT_PROFILE
+        if name != os.path.basename(name) or name.startswith("."):
+            raise ValueError(f"잘못된 프로필 이름입니다: {name}")
+        if not os.path.exists(self._vocabulary_path(name)):
+            raise KeyError(name)
+        return name
+
+    def get_categories(self, name: Optional[str] = None) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+        """
+        프로필의 카테고리/연관성 테이블을 반환합니다. (인덱스를 로드하지 않음)
+
+        Args:
+            name: 프로필 이름 (None이면 default)
+
+        Returns:
+            (카테고리 정의, 카테고리 연관성 정의) 튜플
+
+        Raises:
+            KeyError: 프로필이 없는 경우
+        """
+        name = self.resolve(name)
+        with self._lock:
+            if name not in self._categories:
+                categories, relations = WORD_CATEGORIES, CATEGORY_RELATIONS
+                config_path = os.path.join(self.profiles_dir, name, "categories.json")
+                if name != DEFAULT_PROFILE and os.path.exists(config_path):
+                    with open(config_path, "r", encoding="utf-8") as f:
+                        config = json.load(f)
+                    categories = config.get("categories", categories)
+                    relations = config.get("relations", relations)
+                self._categories[name] = (categories, relations)
+            return self._categories[name]
+
+    def _get_model(self) -> SentenceTransformer:
+        """공유 임베딩 모델을 반환합니다. (처음 호출 시 로드)"""
+        with self._lock:
+            if self.model is None:
+                print(f"Loading embedding model: {self.model_name}")
+                self.model = SentenceTransformer(self.model_name)
+            return self.model
+
+    def get(self, name: Optional[str] = None) -> FAISSService:
+        """
+        프로필의 FAISS 서비스를 반환합니다. 로드되지 않았으면 로드합니다.
+        로드 중인 프로필이 있어도 다른 프로필 요청은 기다리지 않습니다.
+
+        Args:
+            name: 프로필 이름 (None이면 default)
+
+        Returns:
+            프로필 전용 FAISSService
+
+        Raises:
+            KeyError: 프로필이 없는 경우
+            ValueError: 프로필 이름이 잘못된 경우
+        """
+        name = self.resolve(name)
+        with self._lock:
+            service = self.loaded.get(name)
+            if service is not None:
+                self.loaded.move_to_end(name)
+                return service
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                service = self.loaded.get(name)
+                if service is not None:
+                    self.loaded.move_to_end(name)
+                    return service
+
+            categories, relations = self.get_categories(name)
+            logger.info(f"Loading vocabulary profile: {name}")
+            service = FAISSService(
+                model_name=self.model_name,
+                vocabulary_file=self._vocabulary_path(name),
+                model=self._get_model(),
+                categories=categories,
+                category_relations=relations,
+            )
+
+            with self._lock:
+                self.loaded[name] = service
+                evicted = self._evict(keep=name)
+
+        # 전이 테이블 저장(디스크 쓰기)은 관리자 잠금 밖에서 수행해 get_loaded() 호출을 막지 않고,
+        # 저장이 끝나기 전에 같은 프로필을 다시 로드하지 않도록 해당 프로필의 로드 잠금을 잡음
+        for evicted_name, evicted_service in evicted:
+            with self._load_locks[evicted_name]:
+                evicted_service.transitions.save()
+        return service
+
+    def get_loaded(self, name: Optional[str] = None) -> Optional[FAISSService]:
+        """이미 로드된 프로필만 반환합니다. (로드를 유발하지 않음)"""
+        with self._lock:
+            return self.loaded.get(name or DEFAULT_PROFILE)
+
+    def _evict(self, keep: str) -> List[Tuple[str, FAISSService]]:
+        """
+        메모리 예산을 넘으면 가장 오래 사용하지 않은 프로필부터 해제합니다. (잠금 상태에서 호출)
+
+        Returns:
+            해제된 (프로필 이름, 서비스) 목록 (호출자가 잠금 밖에서 전이 테이블을 저장)
+        """
+        evicted = []
+        total = sum(service.memory_usage() for service in self.loaded.values())
+        for name in list(self.loaded.keys()):
+            if total <= self.memory_budget:
+                break
+            if name == keep:
+                continue
+            service = self.loaded.pop(name)
+            evicted.append((name, service))
+            total -= service.memory_usage()
+            logger.info(f"Evicted vocabulary profile: {name}")
+        return evicted
+
+    def save_all(self) -> None:
+        """로드된 모든 프로필의 전이 테이블을 저장합니다."""
+        with self._lock:
+            services = list(self.loaded.values())
+        for service in services:
+            service.transitions.save()
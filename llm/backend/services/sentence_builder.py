@@ -0,0 +1,224 @@
+from typing import Dict, List, Optional
+import logging
+
+from .faiss_service import WORD_CATEGORIES
+
+
+logger = logging.getLogger(__name__)
+
+# 한글 음절 범위 (종성 계산용)
+HANGUL_BASE = 0xAC00
+HANGUL_LAST = 0xD7A3
+JONGSEONG_COUNT = 28
+JONGSEONG_BIEUP = 17  # ㅂ
+JONGSEONG_RIEUL = 8   # ㄹ
+
+# 문장 내 배치 순서 (낮을수록 앞)
+ROLE_ORDER: Dict[str, int] = {
+    "connector": 0,
+    "greeting": 1,
+    "time": 2,
+    "subject": 3,
+    "place": 4,
+    "object": 5,
+    "question": 6,
+    "predicate": 7,
+}
+
+# 형용사성 용언이 주로 속한 카테고리 (명사를 주격 조사 이/가로 받음: 날씨가 좋습니다, 물이 필요합니다)
+DESCRIPTIVE_CATEGORIES = ("상태", "감정", "날씨", "필요")
+
+# 위 카테고리에 있지만 목적어(을/를)를 받는 용언 (물을 원합니다)
+TRANSITIVE_WORDS = ("원하다",)
+
+# 카테고리 → 문장 내 역할
+CATEGORY_ROLES: Dict[str, str] = {
+    "연결": "connector",
+    "인사": "greeting",
+    "시간": "time",
+    "의문": "question",
+    "사람": "noun",
+    "장소": "place",
+    "음식": "noun",
+    "날씨": "noun",
+    "감정": "noun",
+    "동작": "predicate",
+    "상태": "predicate",
+    "필요": "predicate",
+}
+
+
+def _has_batchim(word: str) -> bool:
+    """마지막 글자에 받침이 있는지 확인합니다."""
+    if not word:
+        return False
+    code = ord(word[-1])
+    if code < HANGUL_BASE or code > HANGUL_LAST:
+        return False
+    return (code - HANGUL_BASE) % JONGSEONG_COUNT != 0
+
+
+def _jongseong(char: str) -> int:
+    """한글 음절의 종성 인덱스를 반환합니다. (한글이 아니면 -1)"""
+    code = ord(char)
+    if code < HANGUL_BASE or code > HANGUL_LAST:
+        return -1
+    return (code - HANGUL_BASE) % JONGSEONG_COUNT
+
+
+def _set_jongseong(char: str, jongseong: int) -> str:
+    """한글 음절의 종성을 바꾼 글자를 반환합니다."""
+    code = ord(char) - HANGUL_BASE
+    return chr(HANGUL_BASE + code - code % JONGSEONG_COUNT + jongseong)
+
+
+def _attach_particle(word: str, with_batchim: str, without_batchim: str) -> str:
+    """받침 유무에 따라 조사를 붙입니다. (예: 은/는, 이/가, 을/를)"""
+    return word + (with_batchim if _has_batchim(word) else without_batchim)
+
+
+class SentenceBuilder:
+    """
+    규칙 기반 한국어 문장 조립기
+    LLM을 사용할 수 없거나 응답이 늦을 때 WORD_CATEGORIES의 역할 정보로
+    단어 순서를 정하고 조사와 어미를 붙여 즉시 문장을 만듭니다.
+    """
+
+    def __init__(self, categories: Optional[Dict[str, List[str]]] = None):
+        """
+        문장 조립기 초기화
+
+        Args:
+            categories: 카테고리별 단어 목록 (기본값: WORD_CATEGORIES)
+        """
+        categories = categories or WORD_CATEGORIES
+
+        # 단어 → 역할 조회 테이블
+        # 감정/음식/인사처럼 다른 카테고리에 섞인 기본형(-다)은 용언으로 취급하고,
+        # 여러 카테고리에 속한 단어는 용언 역할을 우선합니다. (예: 좋다, 먹다, 고맙다)
+        self.word_roles: Dict[str, str] = {}
+        self.person_words = set(categories.get("사람", []))
+        self.descriptive_words = {
+            word
+            for category in DESCRIPTIVE_CATEGORIES
+            for word in categories.get(category, [])
+            if self._is_base_form(word) and word not in TRANSITIVE_WORDS
+        }
+        for category, words in categories.items():
+            role = CATEGORY_ROLES.get(category, "noun")
+            for word in words:
+                word_role = role
+                if word_role in ("noun", "greeting") and self._is_base_form(word):
+                    word_role = "predicate"
+                if word not in self.word_roles or word_role == "predicate":
+                    self.word_roles[word] = word_role
+
+    @staticmethod
+    def _is_base_form(word: str) -> bool:
+        """용언 기본형(-다)인지 확인합니다."""
+        return len(word) > 1 and word.endswith("다")
+
+    def _get_role(self, word: str) -> str:
+        """단어의 문장 내 역할을 반환합니다."""
+        role = self.word_roles.get(word)
+        if role is not None:
+            return role
+        # 카테고리에 없는 단어는 기본형 어미(-다)로 용언 여부를 추정
+        if self._is_base_form(word):
+            return "predicate"
+        return "noun"
+
+    def _conjugate(self, predicate: str, question: bool) -> str:
+        """
+        용언 기본형을 합쇼체 종결형으로 바꿉니다.
+        (예: 가다 → 갑니다, 좋다 → 좋습니다, 만들다 → 만듭니다)
+        """
+        stem = predicate[:-1] if self._is_base_form(predicate) else predicate
+        ending = "니까?" if question else "니다."
+        last = stem[-1]
+        jongseong = _jongseong(last)
+
+        if jongseong in (0, JONGSEONG_RIEUL):
+            # 받침이 없거나 ㄹ 탈락하는 경우: 가다 → 갑니다, 만들다 → 만듭니다
+            return stem[:-1] + _set_jongseong(last, JONGSEONG_BIEUP) + ending
+        if jongseong > 0:
+            return stem + "습" + ending
+        # 한글이 아닌 단어는 활용하지 않고 그대로 마무리
+        return predicate + ("?" if question else ".")
+
+    def _connect(self, predicate: str) -> str:
+        """앞선 용언을 연결 어미(-고)로 잇습니다. (예: 먹다 → 먹고)"""
+        stem = predicate[:-1] if self._is_base_form(predicate) else predicate
+        return stem + "고"
+
+    def build_sentence(self, words: List[str]) -> str:
+        """
+        단어 목록으로 규칙 기반 문장을 조립합니다.
+
+        Args:
+            words: 문장 생성에 사용할 단어 목록
+
+        Returns:
+            조립된 문장
+
+        Raises:
+            ValueError: 단어 목록이 비어있는 경우
+        """
+        words = [w.strip() for w in words if w and w.strip()]
+        if not words:
+            raise ValueError("단어 목록이 비어있습니다.")
+
+        # 1. 역할 분류
+        #    첫 번째 사람 명사는 주제(은/는)로 두고, 마지막 용언이 형용사성이면
+        #    다음 명사를 주어(이/가)로, 그 외 명사는 목적어(을/를)로 둡니다.
+        #    용언이 없으면 목적어가 될 수 없으므로 명사에 조사를 붙이지 않습니다.
+        roles = [self._get_role(word) for word in words]
+        predicates_in_order = [w for w, r in zip(words, roles) if r == "predicate"]
+        descriptive = bool(predicates_in_order) and predicates_in_order[-1] in self.descriptive_words
+
+        tagged = []
+        topic_taken = False
+        subject_taken = False
+        for position, (word, role) in enumerate(zip(words, roles)):
+            particle = None
+            if role == "noun":
+                if word in self.person_words and not topic_taken:
+                    role, particle = "subject", ("은", "는")
+                    topic_taken = True
+                elif descriptive and not subject_taken:
+                    role, particle = "subject", ("이", "가")
+                    subject_taken = True
+                elif predicates_in_order:
+                    role, particle = "object", ("을", "를")
+                else:
+                    role = "object"
+            elif role == "place":
+                particle = ("에", "에")
+            tagged.append((ROLE_ORDER[role], position, role, word, particle))
+
+        # 2. 역할 순서대로 정렬 (같은 역할은 선택 순서 유지)
+        tagged.sort()
+        question = any(role == "question" for _, _, role, _, _ in tagged)
+        predicates = [word for _, _, role, word, _ in tagged if role == "predicate"]
+        others = [(role, word, particle) for _, _, role, word, particle in tagged if role != "predicate"]
+
+        # 3. 조사 부착
+        parts = []
+        for role, word, particle in others:
+            parts.append(_attach_particle(word, *particle) if particle else word)
+
+        # 4. 용언 활용 (마지막 용언만 종결형, 나머지는 -고로 연결)
+        if predicates:
+            parts.extend(self._connect(p) for p in predicates[:-1])
+            parts.append(self._conjugate(predicates[-1], question))
+        else:
+            last_role, last_word, _ = others[-1]
+            if last_role in ("subject", "object"):
+                # 서술어가 없으면 마지막 명사를 서술격 조사로 마무리
+                parts[-1] = last_word + ("입니까?" if question else "입니다.")
+            else:
+                parts[-1] = last_word + ("?" if question else ".")
+
+        sentence = " ".join(parts)
+        logger.debug(f"Rule-based sentence: {sentence}")
+        return sentence
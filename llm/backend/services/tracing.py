@@ -0,0 +1,354 @@
+import collections
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# 환경변수 설정
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "0") == "1"
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "2048"))
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "")
+TRACE_EXPORT_FORMAT = os.getenv("TRACE_EXPORT_FORMAT", "json")  # json | otlp
+PROFILER_MIN_INTERVAL = 0.001  # 초
+PROFILER_MAX_DURATION = float(os.getenv("PROFILER_MAX_DURATION", "60"))  # 초, 이후 자동 중지
+
+REQUEST_ID_HEADER = "x-request-id"
+
+# 요청 단위 컨텍스트 (asyncio 작업/스레드 풀로 전파됨)
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+_enabled = TRACING_ENABLED
+_buffer: collections.deque = collections.deque(maxlen=TRACE_BUFFER_SIZE)
+_export_lock = threading.Lock()
+_export_file = None
+
+
+def is_enabled() -> bool:
+    """트레이싱 활성화 여부를 반환합니다."""
+    return _enabled
+
+
+def set_enabled(enabled: bool) -> None:
+    """트레이싱을 실행 중에 켜거나 끕니다."""
+    global _enabled
+    _enabled = enabled
+    logger.info(f"Tracing {'enabled' if enabled else 'disabled'}")
+
+
+def new_request_id() -> str:
+    """새 요청 ID를 생성합니다."""
+    return uuid.uuid4().hex
+
+
+def get_request_id() -> Optional[str]:
+    """현재 컨텍스트의 요청 ID를 반환합니다."""
+    return _request_id.get()
+
+
+class request_context:
+    """요청 ID를 현재 컨텍스트에 설정하는 컨텍스트 매니저"""
+
+    __slots__ = ("request_id", "_token")
+
+    def __init__(self, request_id: Optional[str] = None):
+        self.request_id = request_id or new_request_id()
+        self._token = None
+
+    def __enter__(self) -> str:
+        self._token = _request_id.set(self.request_id)
+        return self.request_id
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _request_id.reset(self._token)
+
+
+class Span:
+    """
+    요청 단위 트레이싱 구간
+    종료 시 링 버퍼와 (설정된 경우) 파일 익스포터로 기록됩니다.
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "attributes",
+                 "start_ns", "end_ns", "status", "_token")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+        self.span_id = uuid.uuid4().hex[:16]
+        self.trace_id = None
+        self.parent_id = None
+        self.start_ns = 0
+        self.end_ns = 0
+        self.status = "ok"
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = _request_id.get() or (parent.trace_id if parent else new_request_id())
+        self._token = _current_span.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        # 제너레이터가 중간에 닫힌 경우(GeneratorExit)는 오류로 보지 않음
+        if exc_type is not None and not issubclass(exc_type, GeneratorExit):
+            self.status = "error"
+            self.attributes.setdefault("error", f"{exc_type.__name__}: {exc}")
+        _record(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "request_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_us": self.start_ns // 1000,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """트레이싱 비활성화 시 사용하는 빈 구간 (할당 없이 재사용)"""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attributes):
+    """
+    트레이싱 구간을 시작합니다.
+    비활성화 상태에서는 공유 no-op 객체를 반환하므로 비용이 거의 없습니다.
+
+    Args:
+        name: 구간 이름 (예: "faiss.similarity_search")
+        **attributes: 구간에 기록할 속성
+
+    Returns:
+        with 문에서 사용할 구간 객체
+    """
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def _record(finished: Span) -> None:
+    data = finished.to_dict()
+    _buffer.append(data)
+    if TRACE_EXPORT_FILE:
+        _export(finished, data)
+
+
+def _otlp_id(value: str, length: int) -> str:
+    """OTLP 형식의 16진수 ID로 변환합니다."""
+    if len(value) == length and all(c in "0123456789abcdef" for c in value):
+        return value
+    return hashlib.md5(value.encode("utf-8")).hexdigest()[:length]
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _to_otlp(finished: Span) -> Dict[str, Any]:
+    otlp_span = {
+        "traceId": _otlp_id(finished.trace_id, 32),
+        "spanId": finished.span_id,
+        "name": finished.name,
+        "kind": 1,
+        "startTimeUnixNano": str(finished.start_ns),
+        "endTimeUnixNano": str(finished.end_ns),
+        "attributes": [
+            {"key": key, "value": _otlp_value(value)}
+            for key, value in finished.attributes.items()
+        ] + [{"key": "request_id", "value": {"stringValue": finished.trace_id}}],
+        "status": {"code": 2 if finished.status == "error" else 1},
+    }
+    if finished.parent_id:
+        otlp_span["parentSpanId"] = finished.parent_id
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": "esc-backend"}},
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [otlp_span],
+            }],
+        }]
+    }
+
+
+def _export(finished: Span, data: Dict[str, Any]) -> None:
+    """종료된 구간을 JSON Lines 파일로 내보냅니다."""
+    global _export_file
+    payload = _to_otlp(finished) if TRACE_EXPORT_FORMAT == "otlp" else data
+    line = json.dumps(payload, ensure_ascii=False, default=str)
+    try:
+        with _export_lock:
+            if _export_file is None:
+                _export_file = open(TRACE_EXPORT_FILE, "a", encoding="utf-8")
+            _export_file.write(line + "\n")
+            _export_file.flush()
+    except OSError as e:
+        logger.error(f"Trace export failed: {e}")
+
+
+def get_spans(request_id: Optional[str] = None, limit: int = 200) -> List[Dict[str, Any]]:
+    """
+    링 버퍼에 기록된 구간을 최신순으로 반환합니다.
+
+    Args:
+        request_id: 특정 요청의 구간만 조회할 경우 요청 ID
+        limit: 최대 반환 개수
+
+    Returns:
+        구간 목록
+    """
+    spans = list(_buffer)
+    if request_id:
+        spans = [s for s in spans if s["request_id"] == request_id]
+    return spans[-limit:][::-1]
+
+
+def clear_spans() -> None:
+    """링 버퍼를 비웁니다."""
+    _buffer.clear()
+
+
+class TracingMiddleware:
+    """
+    HTTP 요청마다 요청 ID를 전파하고 루트 구간을 기록하는 ASGI 미들웨어
+    X-Request-ID 헤더가 있으면 그 값을 사용하고, 응답 헤더로 되돌려 줍니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _enabled:
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope.get("headers", []):
+            if key == REQUEST_ID_HEADER.encode():
+                request_id = value.decode("latin-1")
+                break
+
+        with request_context(request_id) as current_id:
+            with span(f"{scope['method']} {scope['path']}") as root:
+                async def send_with_request_id(message):
+                    if message["type"] == "http.response.start":
+                        root.set_attribute("status_code", message["status"])
+                        headers = list(message.get("headers", []))
+                        headers.append((REQUEST_ID_HEADER.encode(), current_id.encode("latin-1")))
+                        message = dict(message, headers=headers)
+                    await send(message)
+
+                await self.app(scope, receive, send_with_request_id)
+
+
+class SamplingProfiler:
+    """
+    샘플링 프로파일러
+    일정 간격으로 모든 스레드의 호출 스택을 수집해
+    flamegraph.pl/speedscope에서 사용할 수 있는 collapsed stack 형식으로 집계합니다.
+    간격은 PROFILER_MIN_INTERVAL 이상으로 제한되며, 최대 실행 시간이 지나면 자동으로 멈춥니다.
+    """
+
+    def __init__(self):
+        self.counts: collections.Counter = collections.Counter()
+        self.interval = 0.005
+        self.duration = PROFILER_MAX_DURATION
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = 0.005, duration: float = PROFILER_MAX_DURATION) -> None:
+        """
+        프로파일링을 시작합니다. (이미 실행 중이면 무시)
+
+        Args:
+            interval: 샘플링 간격 (초, PROFILER_MIN_INTERVAL 이상으로 보정)
+            duration: 최대 실행 시간 (초, PROFILER_MAX_DURATION 이하로 보정)
+        """
+        if self.running:
+            return
+        self.counts.clear()
+        self.interval = max(interval, PROFILER_MIN_INTERVAL)
+        self.duration = min(max(duration, 0.0), PROFILER_MAX_DURATION)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        logger.info(f"Sampling profiler started (interval={self.interval}s, duration={self.duration}s)")
+
+    def stop(self) -> str:
+        """프로파일링을 중지하고 collapsed stack 결과를 반환합니다."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            logger.info("Sampling profiler stopped")
+        return self.collapsed()
+
+    def collapsed(self) -> str:
+        """collapsed stack 형식 문자열 ("a;b;c 횟수" 한 줄씩)"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.counts.most_common())
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + self.duration
+        while not self._stop.wait(self.interval):
+            if time.monotonic() >= deadline:
+                logger.info("Sampling profiler reached its maximum duration, stopping")
+                break
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.counts[";".join(reversed(stack))] += 1
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,304 @@
+import numpy as np
+from typing import Dict, List, Optional, Set
+import logging
+import os
+import tempfile
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+# 환경변수 설정
+TRANSITION_HALF_LIFE = float(os.getenv("TRANSITION_HALF_LIFE", str(7 * 24 * 3600)))  # 초
+TRANSITION_SAVE_INTERVAL = float(os.getenv("TRANSITION_SAVE_INTERVAL", "60"))  # 초
+# 추천에 쓰일 전이의 최소 감쇠 가중치 (0.5 = 반감기 안에 한 번 이상 선택됨)
+TRANSITION_MIN_STRENGTH = float(os.getenv("TRANSITION_MIN_STRENGTH", "0.5"))
+TRANSITION_MERGE_THRESHOLD = 256  # 대기 중인 갱신이 이만큼 쌓이면 CSR로 병합
+MAX_WEIGHT_SCALE = 1e12  # 가중치 스케일이 이보다 커지면 재정규화
+PRUNE_RATIO = 1e-4  # 현재 스케일 대비 이보다 작은 (충분히 감쇠된) 항목은 병합 시 제거
+
+
+class TransitionTable:
+    """
+    사용 기록 기반 단어 전이 테이블
+    "단어 A 다음에 단어 B를 선택했다"는 이벤트를 어휘 인덱스 기반 CSR 배열로 저장합니다.
+
+    감쇠는 모든 값을 곱해 줄이는 대신, 새 이벤트의 가중치를 시간에 따라
+    2^(경과시간/반감기)로 키우는 방식으로 처리합니다. 행 단위로 정규화하면
+    오래된 이벤트일수록 상대적으로 작아지므로 결과는 지수 감쇠와 같습니다.
+    """
+
+    def __init__(self, vocabulary: List[str], path: Optional[str] = None,
+                 half_life: float = TRANSITION_HALF_LIFE,
+                 save_interval: float = TRANSITION_SAVE_INTERVAL):
+        """
+        전이 테이블 초기화
+
+        Args:
+            vocabulary: 어휘 단어 목록 (행/열 인덱스 기준)
+            path: 저장 파일 경로 (.npz), None이면 저장하지 않음
+            half_life: 이벤트 가중치 반감기 (초)
+            save_interval: 주기적 저장 간격 (초)
+        """
+        self.vocabulary = list(vocabulary)
+        self.word_to_id: Dict[str, int] = {w: i for i, w in enumerate(self.vocabulary)}
+        self.path = path
+        self.half_life = half_life
+        self.save_interval = save_interval
+
+        n = len(self.vocabulary)
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.data = np.zeros(0, dtype=np.float64)
+        self.row_totals = np.zeros(n, dtype=np.float64)
+        self.epoch = time.time()
+
+        # 아직 CSR에 병합되지 않은 갱신 (행 → {열: 가중치})
+        self.pending: Dict[int, Dict[int, float]] = {}
+        self.pending_count = 0
+
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # 저장은 한 번에 하나씩
+        self._last_save = time.time()
+        self._saving = False
+        self._dirty = False
+        self._version = 0  # 기록할 때마다 증가 (저장 도중 들어온 갱신 판별용)
+
+        if self.path and os.path.exists(self.path):
+            self._load()
+
+    def _scale(self) -> float:
+        """현재 시점의 이벤트 가중치 스케일을 반환합니다."""
+        return 2.0 ** ((time.time() - self.epoch) / self.half_life)
+
+    def _renormalize(self, scale: float) -> None:
+        """가중치 스케일이 너무 커지면 기준 시점을 현재로 옮깁니다."""
+        self.data /= scale
+        self.row_totals /= scale
+        for row in self.pending.values():
+            for col in row:
+                row[col] /= scale
+        self.epoch = time.time()
+
+    def record(self, prev_word: str, next_word: str, weight: float = 1.0) -> None:
+        """
+        단어 전이 이벤트를 기록합니다.
+
+        Args:
+            prev_word: 이전에 선택한 단어
+            next_word: 다음에 선택한 단어
+            weight: 이벤트 가중치
+        """
+        prev_id = self.word_to_id.get(prev_word)
+        next_id = self.word_to_id.get(next_word)
+        if prev_id is None or next_id is None or prev_id == next_id:
+            return
+
+        with self._lock:
+            scale = self._scale()
+            if scale > MAX_WEIGHT_SCALE:
+                self._renormalize(scale)
+                scale = 1.0
+
+            increment = weight * scale
+            row = self.pending.setdefault(prev_id, {})
+            row[next_id] = row.get(next_id, 0.0) + increment
+            self.row_totals[prev_id] += increment
+            self.pending_count += 1
+            self._dirty = True
+            self._version += 1
+
+            if self.pending_count >= TRANSITION_MERGE_THRESHOLD:
+                self._merge()
+
+            # 주기적 저장은 호출한 스레드(이벤트 루프)를 막지 않도록 백그라운드 스레드에서 실행
+            save_due = (self.path is not None and not self._saving
+                        and time.time() - self._last_save >= self.save_interval)
+            if save_due:
+                self._saving = True
+                self._last_save = time.time()
+
+        if save_due:
+            threading.Thread(target=self._background_save, name="transition-save", daemon=True).start()
+
+    def record_sequence(self, words: List[str], weight: float = 1.0) -> None:
+        """연속된 단어 쌍을 모두 전이 이벤트로 기록합니다."""
+        for prev_word, next_word in zip(words, words[1:]):
+            self.record(prev_word, next_word, weight)
+
+    def _merge(self) -> None:
+        """대기 중인 갱신을 CSR 배열로 병합합니다. (잠금 상태에서 호출)"""
+        n = len(self.vocabulary)
+        rows = [np.repeat(np.arange(n, dtype=np.int64), np.diff(self.indptr))]
+        cols = [self.indices.astype(np.int64)]
+        vals = [self.data]
+
+        for row_id, row in self.pending.items():
+            rows.append(np.full(len(row), row_id, dtype=np.int64))
+            cols.append(np.fromiter(row.keys(), dtype=np.int64, count=len(row)))
+            vals.append(np.fromiter(row.values(), dtype=np.float64, count=len(row)))
+
+        self._set_from_coo(np.concatenate(rows), np.concatenate(cols), np.concatenate(vals))
+        self.pending.clear()
+        self.pending_count = 0
+
+    def _set_from_coo(self, rows: np.ndarray, cols: np.ndarray, vals: np.ndarray) -> None:
+        """(행, 열, 값) 배열로 CSR을 다시 구성합니다. 중복 항목은 합산합니다."""
+        n = len(self.vocabulary)
+        keys = rows * n + cols
+        order = np.argsort(keys, kind="stable")
+        keys, vals = keys[order], vals[order]
+
+        if len(keys):
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            keys = keys[starts]
+            vals = np.add.reduceat(vals, starts)
+
+            # 충분히 감쇠된 항목 제거
+            keep = vals >= PRUNE_RATIO * self._scale()
+            keys, vals = keys[keep], vals[keep]
+
+        rows = keys // n
+        self.indices = (keys % n).astype(np.int32)
+        self.data = vals.astype(np.float64)
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=self.indptr[1:])
+
+    def top_next(self, word: str, k: int, exclude_words: Optional[Set[str]] = None,
+                 min_strength: float = 0.0) -> List[str]:
+        """
+        단어 다음에 가장 많이 선택된 단어들을 반환합니다. (배열 조회만 수행)
+
+        Args:
+            word: 기준 단어
+            k: 반환할 최대 단어 개수
+            exclude_words: 제외할 단어 집합
+            min_strength: 후보로 쓸 전이의 최소 감쇠 가중치 (오래된 기록 제외)
+
+        Returns:
+            전이 가중치 순으로 정렬된 단어 목록
+        """
+        row_id = self.word_to_id.get(word)
+        if row_id is None or k <= 0:
+            return []
+        exclude_words = exclude_words or set()
+
+        with self._lock:
+            start, end = self.indptr[row_id], self.indptr[row_id + 1]
+            cols = self.indices[start:end]
+            vals = self.data[start:end]
+            pending_row = self.pending.get(row_id)
+            if pending_row:
+                weights = dict(zip(cols.tolist(), vals.tolist()))
+                for col, val in pending_row.items():
+                    weights[col] = weights.get(col, 0.0) + val
+                cols = np.fromiter(weights.keys(), dtype=np.int64, count=len(weights))
+                vals = np.fromiter(weights.values(), dtype=np.float64, count=len(weights))
+
+        threshold = min_strength * self._scale()
+        result = []
+        for idx in np.argsort(-vals, kind="stable"):
+            if vals[idx] < threshold:
+                break
+            candidate = self.vocabulary[cols[idx]]
+            if candidate not in exclude_words:
+                result.append(candidate)
+                if len(result) >= k:
+                    break
+        return result
+
+    def strength(self, word: str) -> float:
+        """단어에서 시작하는 전이의 감쇠된 이벤트 수를 반환합니다. (신뢰도 판단용)"""
+        row_id = self.word_to_id.get(word)
+        if row_id is None:
+            return 0.0
+        return float(self.row_totals[row_id] / self._scale())
+
+    def _background_save(self) -> None:
+        try:
+            self.save()
+        finally:
+            with self._lock:
+                self._saving = False
+
+    def save(self) -> None:
+        """
+        전이 테이블을 파일로 저장합니다. (고유한 임시 파일에 쓴 뒤 교체)
+        쓰기에 실패하면 변경 사항이 남아 있는 것으로 보고 다음 저장 때 다시 시도합니다.
+        """
+        if not self.path:
+            return
+
+        with self._save_lock:
+            with self._lock:
+                self._last_save = time.time()
+                if not self._dirty:
+                    return
+                if self.pending:
+                    self._merge()
+                # 재정규화가 배열을 제자리에서 바꾸므로 복사본을 저장
+                arrays = {
+                    "vocabulary": np.array(self.vocabulary),
+                    "indptr": self.indptr.copy(),
+                    "indices": self.indices.copy(),
+                    "data": self.data.copy(),
+                    "row_totals": self.row_totals.copy(),
+                    "epoch": np.array(self.epoch),
+                }
+                version = self._version
+
+            directory, name = os.path.split(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(prefix=name + ".", suffix=".tmp.npz", dir=directory)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    np.savez_compressed(f, **arrays)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.error(f"Failed to save transition table: {e}")
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return
+
+            with self._lock:
+                # 저장하는 동안 새로 기록된 갱신이 없을 때만 저장 완료로 표시
+                if self._version == version:
+                    self._dirty = False
+            logger.info(f"Saved transition table: {len(arrays['data'])} transitions")
+
+    def _load(self) -> None:
+        """저장된 전이 테이블을 불러옵니다. 어휘가 바뀌었으면 단어 기준으로 다시 매핑합니다."""
+        try:
+            with np.load(self.path, allow_pickle=False) as stored:
+                stored_vocabulary = stored["vocabulary"].tolist()
+                indptr = stored["indptr"]
+                indices = stored["indices"]
+                data = stored["data"]
+                row_totals = stored["row_totals"]
+                epoch = float(stored["epoch"])
+
+            # 배열 크기가 저장된 어휘와 맞지 않으면 손상된 파일로 취급
+            n = len(stored_vocabulary)
+            if (len(indptr) != n + 1 or len(row_totals) != n
+                    or len(indices) != len(data) or indptr[-1] != len(indices)
+                    or np.any(np.diff(indptr) < 0)
+                    or (len(indices) and (indices.min() < 0 or indices.max() >= n))):
+                raise ValueError("array shapes do not match stored vocabulary")
+
+            # 저장 당시 어휘 인덱스 → 현재 어휘 인덱스 (없으면 -1)
+            id_map = np.array([self.word_to_id.get(w, -1) for w in stored_vocabulary], dtype=np.int64)
+            rows = id_map[np.repeat(np.arange(n), np.diff(indptr))]
+            cols = id_map[indices]
+            valid = (rows >= 0) & (cols >= 0)
+            valid_rows = id_map >= 0
+        except (OSError, KeyError, ValueError, IndexError) as e:
+            logger.error(f"Failed to load transition table, starting empty: {e}")
+            return
+
+        self.epoch = epoch
+        self._set_from_coo(rows[valid], cols[valid], data[valid])
+        self.row_totals[id_map[valid_rows]] = row_totals[valid_rows]
+
+        logger.info(f"Loaded transition table: {len(self.data)} transitions")
@@ -1,6 +1,8 @@
 ﻿import io
 import logging
 
+from .tracing import span
+
 try:
     from gtts import gTTS
     GTTS_AVAILABLE = True
@@ -29,11 +31,13 @@ class TTSService:
         try:
             logger.info(f'Generating speech: {text[:50]}...')
             
-            tts = gTTS(text=text, lang=self.lang, slow=False)
-            buffer = io.BytesIO()
-            tts.write_to_fp(buffer)
-            buffer.seek(0)
-            audio_data = buffer.read()
+            with span('tts.synthesize', text_length=len(text)) as synth_span:
+                tts = gTTS(text=text, lang=self.lang, slow=False)
+                buffer = io.BytesIO()
+                tts.write_to_fp(buffer)
+                buffer.seek(0)
+                audio_data = buffer.read()
+                synth_span.set_attribute('bytes', len(audio_data))
             
             logger.info(f'Speech generated: {len(audio_data)} bytes')
             return audio_data
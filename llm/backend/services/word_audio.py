@@ -0,0 +1,276 @@
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from .tts_service import TTSService
+
+
+logger = logging.getLogger(__name__)
+
+# 환경변수에서 단어 음성 아카이브 경로 읽기
+WORD_AUDIO_ARCHIVE = os.getenv("WORD_AUDIO_ARCHIVE", "data/word_audio.bin")
+
+# 인덱스 형식 버전 (합성 방식이 바뀌면 올려서 전체 재생성)
+ARCHIVE_VERSION = 1
+
+
+def index_path_for(archive_path: str) -> str:
+    """아카이브 파일에 대응하는 오프셋 인덱스 파일 경로를 반환합니다."""
+    return archive_path + ".index.json"
+
+
+def clip_digest(word: str, lang: str) -> str:
+    """단어 음성 클립의 변경 여부를 판단하기 위한 해시를 계산합니다."""
+    key = f"{ARCHIVE_VERSION}:{lang}:{word}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def _load_index(index_path: str) -> Dict:
+    if not os.path.exists(index_path):
+        return {"version": ARCHIVE_VERSION, "lang": None, "data_end": 0, "entries": {}}
+    with open(index_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_index(index_path: str, index: Dict) -> None:
+    """인덱스를 임시 파일에 쓴 뒤 교체합니다. (중단되어도 이전 인덱스 유지)"""
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, index_path)
+
+
+def _index_usable(index: Dict, archive_path: str) -> bool:
+    """인덱스가 현재 버전이고 아카이브 파일이 인덱스가 가리키는 끝까지 있는지 확인합니다."""
+    if index.get("version") != ARCHIVE_VERSION:
+        return False
+    size = os.path.getsize(archive_path) if os.path.exists(archive_path) else 0
+    return size >= index.get("data_end", 0)
+
+
+def _replace_archive(new_path: str, archive_path: str, index: Dict) -> None:
+    """
+    새로 쓴 아카이브 파일로 교체하고 인덱스를 저장합니다.
+    실행 중인 서버가 매핑한 기존 파일은 교체 후에도 그대로 유지되며,
+    교체 도중 중단되어도 새 파일과 이전 인덱스가 짝지어지지 않도록 인덱스를 먼저 지웁니다.
+    """
+    index_path = index_path_for(archive_path)
+    if os.path.exists(index_path):
+        os.remove(index_path)
+    os.replace(new_path, archive_path)
+    _save_index(index_path, index)
+
+
+class WordAudioArchive:
+    """
+    사전 합성된 단어 음성 아카이브
+    모든 단어의 MP3 클립을 하나의 파일에 이어 붙이고, 오프셋 인덱스로 조회합니다.
+    파일은 메모리 매핑되어 클립을 복사 없이 memoryview로 반환합니다.
+    """
+
+    def __init__(self, archive_path: str = WORD_AUDIO_ARCHIVE):
+        """
+        단어 음성 아카이브 초기화
+
+        Args:
+            archive_path: 패킹된 오디오 파일 경로
+        """
+        self.archive_path = archive_path
+        self.entries: Dict[str, Dict] = {}
+        self._mmap: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+
+        self._load()
+
+    def _load(self) -> None:
+        index_path = index_path_for(self.archive_path)
+        if not os.path.exists(self.archive_path) or not os.path.exists(index_path):
+            logger.warning(f"Word audio archive not found: {self.archive_path}")
+            return
+
+        index = _load_index(index_path)
+        data_end = index.get("data_end", 0)
+        if data_end == 0:
+            return
+        if data_end > os.path.getsize(self.archive_path):
+            # 인덱스보다 짧은 파일은 손상된 것으로 보고 사용하지 않음
+            logger.error(f"Word audio archive is shorter than its index, ignoring: {self.archive_path}")
+            return
+
+        with open(self.archive_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self.entries = index.get("entries", {})
+
+        logger.info(f"Loaded word audio archive with {len(self.entries)} clips")
+
+    def get_clip(self, word: str) -> Optional[memoryview]:
+        """
+        단어의 MP3 클립을 반환합니다.
+
+        Args:
+            word: 조회할 단어
+
+        Returns:
+            메모리 매핑된 클립 (복사 없음), 없으면 None
+        """
+        entry = self.entries.get(word)
+        if entry is None or self._view is None:
+            return None
+        offset = entry["offset"]
+        return self._view[offset:offset + entry["length"]]
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+def build_archive(vocabulary_file: str = "data/vocabulary.txt",
+                  archive_path: str = WORD_AUDIO_ARCHIVE,
+                  lang: str = "ko",
+                  workers: int = 8,
+                  checkpoint_every: int = 50) -> Dict[str, int]:
+    """
+    어휘 파일의 모든 단어를 합성해 아카이브를 만듭니다.
+    이미 같은 해시로 합성된 단어는 건너뛰고, 중단되어도 마지막 체크포인트부터 이어서 진행합니다.
+    새 클립은 파일 끝에 추가되며, 버려진 클립이 생기면 마지막에 압축합니다.
+    처음부터 다시 만들어야 할 때(버전 변경, 파일 손상)는 별도 파일에 쓴 뒤 교체하므로
+    실행 중인 서버가 매핑한 아카이브를 건드리지 않습니다.
+
+    Args:
+        vocabulary_file: 단어 어휘 파일 경로
+        archive_path: 패킹된 오디오 파일 경로
+        lang: 합성 언어
+        workers: 병렬 합성 작업 수
+        checkpoint_every: 인덱스를 저장할 합성 단위
+
+    Returns:
+        합성/재사용/실패/삭제 개수
+    """
+    with open(vocabulary_file, "r", encoding="utf-8") as f:
+        vocabulary = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+
+    index_path = index_path_for(archive_path)
+    index = _load_index(index_path)
+    target_path = archive_path
+    if not _index_usable(index, archive_path):
+        # 버전이 바뀌었거나 아카이브 파일이 없어졌거나 잘린 경우 별도 파일에 처음부터 다시 합성
+        # (중단된 재합성이 있으면 그 체크포인트부터 이어서 진행)
+        if os.path.exists(index_path):
+            logger.warning(f"Word audio archive is missing, outdated or truncated, rebuilding: {archive_path}")
+        target_path = archive_path + ".build"
+        index = _load_index(index_path_for(target_path))
+        if not _index_usable(index, target_path):
+            index = {"version": ARCHIVE_VERSION, "lang": None, "data_end": 0, "entries": {}}
+    target_index_path = index_path_for(target_path)
+    index["lang"] = lang
+    entries: Dict[str, Dict] = index["entries"]
+
+    # 어휘에서 빠진 단어 제거 후, 새로 추가되었거나 바뀐 단어만 합성 대상으로 선정
+    vocabulary_set = set(vocabulary)
+    removed = [word for word in entries if word not in vocabulary_set]
+    for word in removed:
+        del entries[word]
+
+    pending: List[str] = [
+        word for word in vocabulary
+        if entries.get(word, {}).get("digest") != clip_digest(word, lang)
+    ]
+    reused = len(vocabulary) - len(pending)
+    logger.info(f"Word audio: {reused} up to date, {len(pending)} to synthesize, {len(removed)} removed")
+
+    # 마지막 체크포인트 이후에 쓰인 (인덱스에 없는) 데이터는 잘라냄
+    # 기존 아카이브에 이어 쓸 때도 인덱스가 가리키는 범위는 바뀌지 않음
+    mode = "r+b" if os.path.exists(target_path) else "w+b"
+    tts = TTSService(lang=lang)
+    synthesized = 0
+    failed = 0
+
+    with open(target_path, mode) as archive:
+        archive.truncate(index["data_end"])
+        archive.seek(index["data_end"])
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(tts.text_to_speech, word): word for word in pending}
+            for future in as_completed(futures):
+                word = futures[future]
+                try:
+                    audio_data = future.result()
+                except Exception as e:
+                    logger.error(f"Failed to synthesize '{word}': {e}")
+                    failed += 1
+                    continue
+
+                offset = archive.tell()
+                archive.write(audio_data)
+                entries[word] = {
+                    "offset": offset,
+                    "length": len(audio_data),
+                    "digest": clip_digest(word, lang),
+                }
+                index["data_end"] = archive.tell()
+                synthesized += 1
+
+                if synthesized % checkpoint_every == 0:
+                    archive.flush()
+                    _save_index(target_index_path, index)
+                    logger.info(f"Checkpoint: {synthesized}/{len(pending)} clips")
+
+        archive.flush()
+
+    if target_path == archive_path:
+        _save_index(index_path, index)
+    else:
+        _replace_archive(target_path, archive_path, index)
+        if os.path.exists(target_index_path):
+            os.remove(target_index_path)
+
+    # 버려진 클립(삭제/재합성)이 있으면 압축
+    live_bytes = sum(entry["length"] for entry in entries.values())
+    if live_bytes < index["data_end"]:
+        compact_archive(archive_path)
+
+    return {"synthesized": synthesized, "reused": reused, "failed": failed, "removed": len(removed)}
+
+
+def compact_archive(archive_path: str = WORD_AUDIO_ARCHIVE) -> None:
+    """인덱스에 남아 있는 클립만 새 파일로 다시 패킹합니다."""
+    index_path = index_path_for(archive_path)
+    index = _load_index(index_path)
+    tmp_path = archive_path + ".tmp"
+
+    with open(archive_path, "rb") as src, open(tmp_path, "wb") as dst:
+        for entry in sorted(index["entries"].values(), key=lambda e: e["offset"]):
+            src.seek(entry["offset"])
+            data = src.read(entry["length"])
+            entry["offset"] = dst.tell()
+            dst.write(data)
+        index["data_end"] = dst.tell()
+
+    _replace_archive(tmp_path, archive_path, index)
+    logger.info(f"Compacted word audio archive to {index['data_end']} bytes")
+
+
+if __name__ == "__main__":
+    # 사용법: python -m services.word_audio [--workers 8]
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description="Pre-synthesize vocabulary words into a packed audio archive")
+    parser.add_argument("--vocabulary", default="data/vocabulary.txt")
+    parser.add_argument("--archive", default=WORD_AUDIO_ARCHIVE)
+    parser.add_argument("--lang", default="ko")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    result = build_archive(args.vocabulary, args.archive, lang=args.lang, workers=args.workers)
+    print(f"Word audio archive built: {result}")
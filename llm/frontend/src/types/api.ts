@@ -14,6 +14,7 @@ export interface GenerateRequest {
 
 export interface GenerateResponse {
   sentence: string;
+  source?: 'llm' | 'rule';
 }
 
 export interface TTSRequest {